@@ -1,7 +1,5 @@
 # babcock_university_assistant.py
 # Babcock University branded multi-source assistant with enhanced UI
-!pip install pdfplumber
-!pip install python-docx
 import os
 import pdfplumber
 import gradio as gr
@@ -9,6 +7,11 @@ import google.generativeai as genai
 from pathlib import Path
 import docx
 import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration
 try:
@@ -37,6 +40,13 @@ TEXT_SOURCES = {
     "handbook": "handbook.docx"
 }
 
+# Configuration for multi-turn conversation sessions
+MAX_SESSIONS = 5000                 # LRU cap on sessions kept in memory
+SESSION_TTL_SECONDS = 30 * 60       # Drop sessions idle for longer than this
+HISTORY_TOKEN_BUDGET = 1500         # Max tokens of history sent with each question
+SUMMARY_TOKEN_BUDGET = 500          # Max tokens kept in the running summary
+COMPACTION_WORKERS = 4              # Max concurrent background summarization calls
+
 # Babcock University branding colors and styles
 BABCOCK_CSS = """
 /* Babcock University Brand Colors */
@@ -428,19 +438,207 @@ def create_comprehensive_context(all_documents, max_chars=15000):
 
     return combined_context
 
+# Local stand-in for the Gemini model, used by load tests (see loadtest.py)
+class StubModel:
+    """Answer every prompt with canned text after a fixed delay"""
+
+    class Response:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return self.Response(f"Stub answer to a {len(prompt)} character prompt.")
+
 # Setup Gemini
-try:
-    model = genai.GenerativeModel("gemini-2.0-flash-exp")
-    print("✓ Gemini model initialized")
-except Exception as e:
-    print(f"❌ Error setting up Gemini: {e}")
-    exit()
+STUB_MODEL_LATENCY = os.environ.get("BABCOCK_STUB_LATENCY")
+if STUB_MODEL_LATENCY is not None:
+    model = StubModel(float(STUB_MODEL_LATENCY))
+    print(f"✓ Stub model initialized ({model.latency}s latency)")
+else:
+    try:
+        model = genai.GenerativeModel("gemini-2.0-flash-exp")
+        print("✓ Gemini model initialized")
+    except Exception as e:
+        print(f"❌ Error setting up Gemini: {e}")
+        exit()
 
 # Global storage for all documents
 university_documents = {}
 
-def answer_question(question):
-    """Answer questions using Babcock University documents and general knowledge"""
+# Conversation session storage
+class ConversationSession:
+    """Compact per-session state: a running summary plus recent verbatim turns"""
+    __slots__ = ("summary", "turns", "last_active", "compacting")
+
+    def __init__(self):
+        self.summary = ""
+        self.turns = []  # list of (question, answer) tuples, oldest first
+        self.last_active = time.monotonic()
+        self.compacting = False  # set while a background compaction owns the oldest turns
+
+conversation_sessions = OrderedDict()
+sessions_lock = threading.Lock()
+compaction_executor = ThreadPoolExecutor(max_workers=COMPACTION_WORKERS, thread_name_prefix="compaction")
+
+# Function to estimate token count of text
+def estimate_tokens(text):
+    """Roughly estimate tokens (about 4 characters per token)"""
+    return (len(text) + 3) // 4
+
+def format_turn(question, answer):
+    """Format a single question/answer turn for the prompt"""
+    return f"Student: {question}\nAssistant: {answer}\n"
+
+def get_session(session_id):
+    """Get or create a session, evicting expired and least recently used sessions"""
+    now = time.monotonic()
+    with sessions_lock:
+        # Expire idle sessions; the oldest are at the front of the OrderedDict
+        while conversation_sessions:
+            oldest_id, oldest = next(iter(conversation_sessions.items()))
+            if now - oldest.last_active <= SESSION_TTL_SECONDS:
+                break
+            del conversation_sessions[oldest_id]
+
+        session = conversation_sessions.get(session_id)
+        if session is None:
+            session = ConversationSession()
+            conversation_sessions[session_id] = session
+            while len(conversation_sessions) > MAX_SESSIONS:
+                conversation_sessions.popitem(last=False)
+        else:
+            conversation_sessions.move_to_end(session_id)
+        session.last_active = now
+        return session
+
+def clear_session(session_id):
+    """Forget the conversation history for a session"""
+    with sessions_lock:
+        conversation_sessions.pop(session_id, None)
+
+DROPPED_HISTORY_NOTE = "(Some earlier conversation could not be summarized and was omitted.)"
+
+def summarize_turns(summary, turns):
+    """Fold older turns into the running summary with a single model call, or return None on failure"""
+    transcript = "".join(format_turn(q, a) for q, a in turns)
+    prompt = f"""Update the summary of a conversation between a student and the Babcock University assistant.
+
+Current summary:
+{summary or "(none)"}
+
+New conversation turns:
+{transcript}
+
+Write an updated summary in at most {SUMMARY_TOKEN_BUDGET * 3 // 4} words. Keep facts, names, programs and open questions the student may refer back to.
+
+Updated summary:"""
+
+    try:
+        new_summary = model.generate_content(prompt).text.strip()
+    except Exception as e:
+        print(f"Error summarizing conversation: {str(e)}")
+        return None
+
+    return new_summary[:SUMMARY_TOKEN_BUDGET * 4]
+
+def history_tokens(session):
+    """Tokens the session would need to send its full summary and turns"""
+    return estimate_tokens(session.summary) + sum(estimate_tokens(format_turn(q, a)) for q, a in session.turns)
+
+def schedule_compaction(session):
+    """Queue the session for background compaction if it is over budget; return the future"""
+    with sessions_lock:
+        if session.compacting or history_tokens(session) <= HISTORY_TOKEN_BUDGET:
+            return None
+        # Stays set while queued, so a session is never queued twice
+        session.compacting = True
+
+    return compaction_executor.submit(compact_history, session)
+
+def compact_history(session):
+    """Summarize the oldest turns until the session history fits the token budget"""
+    try:
+        while True:
+            with sessions_lock:
+                summary, turns = session.summary, list(session.turns)
+            turn_tokens = [estimate_tokens(format_turn(q, a)) for q, a in turns]
+            total = estimate_tokens(summary) + sum(turn_tokens)
+            if total <= HISTORY_TOKEN_BUDGET:
+                return
+
+            # Fold just enough of the oldest turns, always keeping the latest verbatim
+            fold = 0
+            while fold < len(turns) - 1 and total > HISTORY_TOKEN_BUDGET - SUMMARY_TOKEN_BUDGET:
+                total -= turn_tokens[fold]
+                fold += 1
+            if not fold:
+                return
+
+            # Summarize outside the lock; the compacting flag keeps other threads
+            # off these turns, and new turns are only ever appended after them
+            new_summary = summarize_turns(summary, turns[:fold])
+
+            with sessions_lock:
+                if new_summary is not None:
+                    session.summary = new_summary
+                    session.turns = session.turns[fold:]
+                    continue
+
+                # Keep turns that can still be sent; drop only what cannot fit
+                dropped = 0
+                while len(session.turns) > 1 and history_tokens(session) > HISTORY_TOKEN_BUDGET:
+                    session.turns.pop(0)
+                    dropped += 1
+                if dropped and DROPPED_HISTORY_NOTE not in session.summary:
+                    session.summary = f"{session.summary}\n{DROPPED_HISTORY_NOTE}".strip()
+                return
+    finally:
+        with sessions_lock:
+            session.compacting = False
+
+def build_history(session):
+    """Build the conversation history block for the prompt, within HISTORY_TOKEN_BUDGET"""
+    with sessions_lock:
+        summary, turns = session.summary, list(session.turns)
+    if not summary and not turns:
+        return ""
+
+    summary_block = f"Summary of earlier conversation:\n{summary}\n\n" if summary else ""
+    recent_header = "Recent conversation:\n"
+    budget_chars = HISTORY_TOKEN_BUDGET * 4 - len(summary_block) - len(recent_header)
+
+    # Newest turns first; older turns still awaiting compaction are left out
+    recent = []
+    for question, answer in reversed(turns):
+        turn = format_turn(question, answer)
+        if len(turn) > budget_chars:
+            if not recent and budget_chars > 0:
+                # The latest turn alone is too long: shorten its answer, then its question
+                overflow = len(turn) - budget_chars
+                answer = answer[:max(0, len(answer) - overflow)]
+                overflow -= len(turn) - len(format_turn(question, answer))
+                if overflow > 0:
+                    question = question[:max(0, len(question) - overflow)]
+                recent.append(format_turn(question, answer))
+            break
+        recent.append(turn)
+        budget_chars -= len(turn)
+
+    history = summary_block
+    if recent:
+        history += recent_header + "".join(reversed(recent))
+    return history
+
+def new_session_id():
+    """Create a conversation session id for a browser page"""
+    return uuid.uuid4().hex
+
+def answer_question(question, session_id=None):
+    """Answer questions using Babcock University documents, conversation history and general knowledge"""
     if not question.strip():
         return "Please ask a question about Babcock University or any related topic."
 
@@ -448,12 +646,20 @@ def answer_question(question):
 
     context = create_comprehensive_context(university_documents)
 
+    # Only the browser UI sets a session id (on page load); API calls stay stateless
+    session = get_session(session_id) if session_id else None
+    history = build_history(session) if session else ""
+    history_section = f"""
+Previous Conversation:
+{history}
+""" if history else ""
+
     if context:
         prompt = f"""You are an intelligent assistant for Babcock University, a prestigious Seventh-day Adventist institution in Nigeria. You have access to comprehensive university information and general knowledge.
 
 Babcock University Information:
 {context}
-
+{history_section}
 Student Question: {question}
 
 Instructions:
@@ -462,11 +668,12 @@ Instructions:
 - For general academic topics or any topic (except vulgar or potentially dangerous topic), integrate your broader knowledge seamlessly
 - Maintain a professional, supportive tone appropriate for a university setting
 - Be comprehensive yet concise in your responses
+- Use the previous conversation, if any, to understand follow-up questions
 
 Answer:"""
     else:
         prompt = f"""You are an intelligent assistant for Babcock University, a prestigious Seventh-day Adventist institution in Nigeria.
-
+{history_section}
 Student Question: {question}
 
 Please provide a helpful and accurate response using your knowledge about universities and academic topics.
@@ -475,12 +682,25 @@ Answer:"""
 
     try:
         response = model.generate_content(prompt)
-        return response.text
+        answer = response.text
     except Exception as e:
         error_msg = f"I apologize, but I encountered an error while processing your question. Please try again or contact support if the issue persists."
         print(f"Error: {str(e)}")
         return error_msg
 
+    if session:
+        with sessions_lock:
+            session.turns.append((question, answer))
+        # Summarize in the background so the answer is not held up by a second model call
+        schedule_compaction(session)
+    return answer
+
+def clear_conversation(session_id=None):
+    """Clear the inputs and forget the conversation for this session"""
+    if session_id:
+        clear_session(session_id)
+    return "", ""
+
 def get_document_status():
     """Get status of loaded documents"""
     if not university_documents:
@@ -532,6 +752,9 @@ if __name__ == "__main__":
         theme=gr.themes.Soft()
     ) as interface:
 
+        # Conversation session id, set on page load; API callers never get one
+        session_state = gr.State(None)
+
         # Header Section
         with gr.Row():
             with gr.Column():
@@ -644,26 +867,36 @@ if __name__ == "__main__":
         """)
 
         # Event handlers
+        interface.load(
+            fn=new_session_id,
+            outputs=session_state,
+            api_name=False
+        )
+
         submit_btn.click(
             fn=answer_question,
-            inputs=question_input,
-            outputs=answer_output
+            inputs=[question_input, session_state],
+            outputs=answer_output,
+            api_name="answer"
         )
 
         clear_btn.click(
-            fn=lambda: ("", ""),
+            fn=clear_conversation,
+            inputs=session_state,
             outputs=[question_input, answer_output]
         )
 
         reload_btn.click(
             fn=reload_documents,
-            outputs=status_display
+            outputs=status_display,
+            api_name="reload"
         )
 
         question_input.submit(
             fn=answer_question,
-            inputs=question_input,
-            outputs=answer_output
+            inputs=[question_input, session_state],
+            outputs=answer_output,
+            api_name=False
         )
 
         # Add this script at the end of your Gradio interface definition
@@ -673,8 +906,8 @@ if __name__ == "__main__":
     print("🚀 Launching Babcock University Assistant...")
     interface.launch(
         debug=True,
-        share=True,
+        share=STUB_MODEL_LATENCY is None,
         server_name="0.0.0.0",
-        server_port=7860,
+        server_port=int(os.environ.get("PORT", 7860)),
         show_error=True
     )
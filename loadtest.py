@@ -0,0 +1,372 @@
+# loadtest.py
+# Concurrent load-testing harness for the Babcock University assistant
+#
+# Starts app.py with the Gemini model replaced by a local stub of configurable
+# latency, then drives its HTTP/Gradio endpoints with open-loop (Poisson)
+# arrivals at each concurrency level and reports throughput, error rate and
+# p50/p95/p99 latency and time-to-first-byte for each request kind. Results
+# are appended to a JSON lines file so capacity can be tracked over time.
+#
+# Example:
+#   python loadtest.py --users 1,10,50,100 --rate-per-user 0.5 --duration 30
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+DEFAULT_MIX = "answer=0.9,page=0.1"
+
+QUESTIONS = [
+    "What programs does Babcock University offer?",
+    "How do I apply for admission?",
+    "What are the tuition fees?",
+    "What are the admission requirements for the School of Medicine?",
+    "When does the academic session start?",
+]
+
+# Function to send one HTTP/1.0 request and read the response headers
+async def open_request(host, port, method, path, body=None):
+    """Send a request and return (status, reader, writer) once the headers are read"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        headers = f"{method} {path} HTTP/1.0\r\nHost: {host}:{port}\r\n"
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+        else:
+            payload = b""
+        writer.write(headers.encode("ascii") + b"\r\n" + payload)
+        await writer.drain()
+
+        head = await reader.readuntil(b"\r\n\r\n")
+    except BaseException:
+        writer.close()
+        raise
+    status = int(head.split(b" ", 2)[1])
+    return status, reader, writer
+
+async def http_request(host, port, method, path, body=None):
+    """Return (status, body bytes, seconds to first response byte)"""
+    start = time.perf_counter()
+    status, reader, writer = await open_request(host, port, method, path, body)
+    ttfb = time.perf_counter() - start
+    try:
+        content = await reader.read()
+    finally:
+        writer.close()
+    return status, content, ttfb
+
+# Function to discover the Gradio API prefix ("/gradio_api" on Gradio 5+)
+async def get_api_prefix(host, port):
+    """Read the API prefix from the Gradio config endpoint"""
+    status, content, _ = await asyncio.wait_for(http_request(host, port, "GET", "/config"), 10.0)
+    if status != 200:
+        return ""
+    return json.loads(content).get("api_prefix", "").rstrip("/")
+
+# Request kinds that make up the request mix; each returns (ok, ttfb)
+async def request_page(host, port, api_prefix):
+    """Load the main page"""
+    status, _, ttfb = await http_request(host, port, "GET", "/")
+    return status == 200, ttfb
+
+async def call_gradio_api(host, port, api_prefix, api_name, data):
+    """Submit a Gradio API call and wait for its result stream
+
+    TTFB is the first byte of the submit response, i.e. the time until the
+    queue accepts the call and returns its event id. The answer and reload
+    endpoints do not stream, so the first result event is the complete one
+    and its timing is the end-to-end latency.
+    """
+    call_path = f"{api_prefix}/call/{api_name}"
+    status, content, ttfb = await http_request(host, port, "POST", call_path, {"data": data})
+    if status != 200:
+        return False, ttfb
+    event_id = urllib.parse.quote(json.loads(content)["event_id"])
+
+    status, reader, writer = await open_request(host, port, "GET", f"{call_path}/{event_id}")
+    try:
+        if status != 200:
+            return False, ttfb
+        while True:
+            line = await reader.readline()
+            if not line:
+                return False, ttfb
+            line = line.strip()
+            if line in (b"event: complete", b"event: error"):
+                return line == b"event: complete", ttfb
+    finally:
+        writer.close()
+
+async def request_answer(host, port, api_prefix):
+    """Ask a question through the answer endpoint"""
+    return await call_gradio_api(host, port, api_prefix, "answer", [random.choice(QUESTIONS)])
+
+async def request_reload(host, port, api_prefix):
+    """Reload the university documents"""
+    return await call_gradio_api(host, port, api_prefix, "reload", [])
+
+REQUEST_KINDS = {
+    "answer": request_answer,
+    "page": request_page,
+    "reload": request_reload,
+}
+
+def parse_mix(mix):
+    """Parse a request mix such as 'answer=0.9,page=0.1' into (kinds, weights)"""
+    kinds, weights = [], []
+    for item in mix.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"Unknown request kind '{kind}', expected one of {', '.join(REQUEST_KINDS)}")
+        weight = float(weight or 1)
+        if weight < 0:
+            raise ValueError(f"Weight for '{kind}' must not be negative")
+        kinds.append(kind)
+        weights.append(weight)
+    if not sum(weights) > 0:
+        raise ValueError("At least one request kind needs a positive weight")
+    return kinds, weights
+
+def parse_users(users):
+    """Parse comma-separated concurrency levels such as '1,10,50'"""
+    levels = [int(level) for level in users.split(",")]
+    if any(level <= 0 for level in levels):
+        raise ValueError("Concurrency levels must be positive integers")
+    return levels
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+# Function to run one concurrency level with open-loop Poisson arrivals
+async def run_level(host, port, api_prefix, users, rate_per_user, duration, kinds, weights, timeout):
+    """Generate load for one level and return its summary"""
+    arrival_rate = users * rate_per_user
+    results = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def one_request(kind):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        start = time.perf_counter()
+        try:
+            ok, ttfb = await asyncio.wait_for(REQUEST_KINDS[kind](host, port, api_prefix), timeout)
+            outcome = "ok" if ok else "error"
+        except asyncio.TimeoutError:
+            outcome, ttfb = "timeout", None
+        except Exception:
+            outcome, ttfb = "error", None
+        finally:
+            in_flight -= 1
+        results.append((kind, outcome, time.perf_counter() - start, ttfb))
+
+    # Arrivals do not wait for earlier requests to finish (open loop)
+    tasks = []
+    start = time.perf_counter()
+    next_arrival = start
+    while True:
+        next_arrival += random.expovariate(arrival_rate)
+        if next_arrival - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        kind = random.choices(kinds, weights)[0]
+        tasks.append(asyncio.create_task(one_request(kind)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    kind_stats = {}
+    for kind, weight in zip(kinds, weights):
+        stats = kind_stats.setdefault(kind, summarize_results([r for r in results if r[0] == kind], elapsed))
+        stats["offered_rps"] = stats.get("offered_rps", 0.0) + arrival_rate * weight / sum(weights)
+    return {
+        "users": users,
+        "offered_rps": arrival_rate,
+        "max_in_flight": max_in_flight,
+        "kinds": kind_stats,
+        "overall": summarize_results(results, elapsed),
+    }
+
+def summarize_results(results, elapsed):
+    """Summarize (kind, outcome, latency, ttfb) results over elapsed seconds"""
+    # Percentiles cover every request, so failures and timeouts under
+    # overload push them up instead of dropping out of the sample
+    successes = sum(1 for r in results if r[1] == "ok")
+    errors = sum(1 for r in results if r[1] == "error")
+    timeouts = sum(1 for r in results if r[1] == "timeout")
+    latencies = sorted(r[2] for r in results)
+    failed_latencies = sorted(r[2] for r in results if r[1] != "ok")
+    ttfbs = sorted(r[3] for r in results if r[3] is not None)
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "timeouts": timeouts,
+        "error_rate": (errors + timeouts) / len(results) if results else 0.0,
+        "throughput_rps": successes / elapsed if elapsed else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "failed_latency_p50": percentile(failed_latencies, 50),
+        "ttfb_p50": percentile(ttfbs, 50),
+        "ttfb_p95": percentile(ttfbs, 95),
+        "ttfb_p99": percentile(ttfbs, 99),
+    }
+
+def format_seconds(value):
+    """Format seconds as milliseconds for the report table"""
+    return "-" if value is None else f"{value * 1000:.0f}"
+
+def print_report(levels):
+    """Print a table summarizing each request kind at each concurrency level"""
+    print(f"{'users':>6} {'kind':>7} {'rps in':>7} {'rps out':>8} {'errors':>7} {'t/outs':>7} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'ttfb50':>7} {'ttfb95':>7} {'ttfb99':>7}")
+    for level in levels:
+        for kind, stats in level["kinds"].items():
+            print(f"{level['users']:>6} {kind:>7} {stats['offered_rps']:>7.1f} {stats['throughput_rps']:>8.1f} "
+                  f"{stats['error_rate']:>6.1%} {stats['timeouts']:>7} "
+                  f"{format_seconds(stats['latency_p50']):>7} {format_seconds(stats['latency_p95']):>7} "
+                  f"{format_seconds(stats['latency_p99']):>7} {format_seconds(stats['ttfb_p50']):>7} "
+                  f"{format_seconds(stats['ttfb_p95']):>7} {format_seconds(stats['ttfb_p99']):>7}")
+
+def save_results(path, config, levels):
+    """Append this run to the results file"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "config": config,
+        "levels": levels,
+    }
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(record) + "\n")
+    print(f"✓ Results appended to {path}")
+
+# Function to start the app with the stub model
+def start_app(port, stub_latency, log_path):
+    """Launch app.py in a subprocess with the Gemini model stubbed out, logging to log_path"""
+    env = dict(os.environ, BABCOCK_STUB_LATENCY=str(stub_latency), PORT=str(port))
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    with open(log_path, "w", encoding="utf-8") as log_file:
+        return subprocess.Popen(
+            [sys.executable, app_path],
+            env=env,
+            stdout=log_file,
+            stderr=subprocess.STDOUT
+        )
+
+async def port_in_use(host, port):
+    """Check whether something is already listening on the port"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 2.0)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+async def wait_until_ready(host, port, app_process=None, log_path=None, timeout=120.0):
+    """Poll the main page until the app responds, failing fast if the app exits"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if app_process is not None and app_process.poll() is not None:
+            raise RuntimeError(f"App exited with code {app_process.returncode} during startup, see {log_path}")
+        try:
+            status, _, _ = await asyncio.wait_for(http_request(host, port, "GET", "/"), 5.0)
+            if status == 200:
+                return
+        except (OSError, asyncio.TimeoutError):
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"App did not start on {host}:{port} within {timeout:.0f}s")
+
+async def main(args, kinds, weights, levels_config):
+    app_process = None
+    if not args.no_spawn:
+        if await port_in_use(args.host, args.port):
+            raise SystemExit(f"Port {args.port} is already in use; pick another --port or use --no-spawn")
+        print(f"Starting app with stub model ({args.stub_latency}s latency) on port {args.port}, logging to {args.app_log}...")
+        app_process = start_app(args.port, args.stub_latency, args.app_log)
+
+    try:
+        await wait_until_ready(args.host, args.port, app_process, args.app_log)
+        api_prefix = await get_api_prefix(args.host, args.port)
+
+        levels = []
+        for users in levels_config:
+            if app_process is not None and app_process.poll() is not None:
+                raise RuntimeError(f"App exited with code {app_process.returncode}, see {args.app_log}")
+            print(f"Running {users} users at {users * args.rate_per_user:.1f} req/s for {args.duration:.0f}s...")
+            levels.append(await run_level(
+                args.host, args.port, api_prefix, users, args.rate_per_user,
+                args.duration, kinds, weights, args.timeout
+            ))
+    finally:
+        if app_process:
+            app_process.terminate()
+            app_process.wait()
+
+    print_report(levels)
+    config = {
+        "mix": dict(zip(kinds, weights)),
+        "rate_per_user": args.rate_per_user,
+        "duration": args.duration,
+        "timeout": args.timeout,
+        "stub_latency": None if args.no_spawn else args.stub_latency,
+    }
+    save_results(args.output, config, levels)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Babcock University assistant")
+    parser.add_argument("--users", default="1,10,50,100",
+                        help="Comma-separated concurrency levels (simulated users)")
+    parser.add_argument("--rate-per-user", type=float, default=0.5,
+                        help="Requests per second generated by each user (Poisson)")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Seconds of arrivals per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"Weighted request mix of {', '.join(REQUEST_KINDS)} (default: {DEFAULT_MIX})")
+    parser.add_argument("--stub-latency", type=float, default=1.0,
+                        help="Seconds the stub model takes to answer")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="Per-request timeout in seconds")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7861)
+    parser.add_argument("--no-spawn", action="store_true",
+                        help="Target an already running app instead of starting one")
+    parser.add_argument("--output", default="loadtest_results.jsonl",
+                        help="JSON lines file the results are appended to")
+    parser.add_argument("--app-log", default="loadtest_app.log",
+                        help="File the spawned app's output is written to")
+    args = parser.parse_args()
+
+    try:
+        kinds, weights = parse_mix(args.mix)
+        levels_config = parse_users(args.users)
+    except ValueError as e:
+        parser.error(str(e))
+    for name in ("rate_per_user", "duration", "timeout"):
+        if not getattr(args, name) > 0:
+            parser.error(f"--{name.replace('_', '-')} must be positive")
+    if args.stub_latency < 0:
+        parser.error("--stub-latency must not be negative")
+
+    asyncio.run(main(args, kinds, weights, levels_config))
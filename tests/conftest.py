@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Use the local stub model so tests never call Gemini
+os.environ["BABCOCK_STUB_LATENCY"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,56 @@
+import pytest
+
+import loadtest
+
+
+def test_percentile_of_empty_list_is_none():
+    assert loadtest.percentile([], 50) is None
+
+
+def test_percentile_of_single_value():
+    assert loadtest.percentile([0.5], 50) == 0.5
+    assert loadtest.percentile([0.5], 99) == 0.5
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+
+    assert loadtest.percentile(values, 50) == 50
+    assert loadtest.percentile(values, 95) == 95
+    assert loadtest.percentile(values, 99) == 99
+    assert loadtest.percentile(values, 100) == 100
+
+
+def test_parse_mix_reads_kinds_and_weights():
+    assert loadtest.parse_mix("answer=0.9, page=0.1,reload") == (["answer", "page", "reload"], [0.9, 0.1, 1.0])
+
+
+@pytest.mark.parametrize("mix", ["chat=1", "answer=-1,page=1", "answer=0,page=0"])
+def test_parse_mix_rejects_invalid_mix(mix):
+    with pytest.raises(ValueError):
+        loadtest.parse_mix(mix)
+
+
+def test_parse_users_reads_levels():
+    assert loadtest.parse_users("1,10,50") == [1, 10, 50]
+
+
+@pytest.mark.parametrize("users", ["0", "1,-5", "ten"])
+def test_parse_users_rejects_non_positive_levels(users):
+    with pytest.raises(ValueError):
+        loadtest.parse_users(users)
+
+
+def test_summarize_results_counts_failures_in_latency():
+    results = [
+        ("answer", "ok", 1.0, 0.01),
+        ("answer", "error", 2.0, 0.01),
+        ("answer", "timeout", 5.0, None),
+    ]
+
+    stats = loadtest.summarize_results(results, elapsed=2.0)
+
+    assert (stats["requests"], stats["errors"], stats["timeouts"]) == (3, 1, 1)
+    assert stats["throughput_rps"] == 0.5
+    assert stats["latency_p99"] == 5.0
+    assert stats["ttfb_p99"] == 0.01
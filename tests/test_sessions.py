@@ -0,0 +1,117 @@
+import pytest
+
+for module in ("gradio", "google.generativeai", "pdfplumber", "docx"):
+    pytest.importorskip(module)
+
+import app  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions(monkeypatch):
+    monkeypatch.setattr(app, "conversation_sessions", app.OrderedDict())
+    monkeypatch.setattr(app, "MAX_SESSIONS", 3)
+    monkeypatch.setattr(app, "SESSION_TTL_SECONDS", 60)
+    monkeypatch.setattr(app, "HISTORY_TOKEN_BUDGET", 200)
+    monkeypatch.setattr(app, "SUMMARY_TOKEN_BUDGET", 50)
+
+
+@pytest.fixture
+def compactions(monkeypatch):
+    futures = []
+    schedule = app.schedule_compaction
+
+    def recording_schedule(session):
+        future = schedule(session)
+        if future is not None:
+            futures.append(future)
+        return future
+
+    monkeypatch.setattr(app, "schedule_compaction", recording_schedule)
+    return futures
+
+
+def wait_for_compaction(futures):
+    for future in futures:
+        future.result(timeout=5)
+
+
+def test_lru_eviction_keeps_most_recently_used():
+    for session_id in "abc":
+        app.get_session(session_id)
+    app.get_session("a")
+    app.get_session("d")
+
+    assert list(app.conversation_sessions) == ["c", "a", "d"]
+
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(app.time, "monotonic", lambda: now[0])
+    app.get_session("old")
+    now[0] += 30
+    app.get_session("recent")
+    now[0] += 45
+
+    app.get_session("new")
+
+    assert list(app.conversation_sessions) == ["recent", "new"]
+
+
+def test_api_calls_without_session_id_are_stateless(compactions):
+    app.answer_question("What are the tuition fees?")
+    app.answer_question("What are the tuition fees?", None)
+
+    assert not app.conversation_sessions
+    assert not compactions
+
+
+def test_each_turn_is_summarized_once(monkeypatch, compactions):
+    summarized = []
+    summarize = app.summarize_turns
+
+    def recording_summarize(summary, turns):
+        summarized.extend(turns)
+        return summarize(summary, turns)
+
+    monkeypatch.setattr(app, "summarize_turns", recording_summarize)
+    for i in range(10):
+        app.answer_question(f"Question {i}: " + "x" * 300, "student")
+        wait_for_compaction(compactions)
+
+    questions = [question for question, _ in summarized]
+    assert questions
+    assert len(questions) == len(set(questions))
+    remaining = [question for question, _ in app.conversation_sessions["student"].turns]
+    assert not set(questions) & set(remaining)
+
+
+def test_history_stays_within_budget(compactions):
+    for i in range(10):
+        app.answer_question(f"Question {i}: " + "x" * 300, "student")
+        session = app.conversation_sessions["student"]
+        assert app.estimate_tokens(app.build_history(session)) <= app.HISTORY_TOKEN_BUDGET
+        wait_for_compaction(compactions)
+        assert app.history_tokens(session) <= app.HISTORY_TOKEN_BUDGET
+
+
+def test_oversized_question_is_trimmed_to_budget():
+    session = app.get_session("student")
+    session.turns.append(("q" * 5000, "a" * 5000))
+
+    history = app.build_history(session)
+
+    assert app.estimate_tokens(history) <= app.HISTORY_TOKEN_BUDGET
+    assert "Student: q" in history
+
+
+def test_failed_summary_keeps_turns_that_fit(monkeypatch):
+    monkeypatch.setattr(app, "summarize_turns", lambda summary, turns: None)
+    session = app.get_session("student")
+    session.turns.extend([("q1", "a" * 300), ("q2", "a" * 300), ("q3", "a" * 300)])
+
+    app.schedule_compaction(session).result(timeout=5)
+
+    # q1 and q2 were due to be folded, but only q1 must go to fit the budget
+    assert [question for question, _ in session.turns] == ["q2", "q3"]
+    assert app.DROPPED_HISTORY_NOTE in session.summary
+    assert app.history_tokens(session) <= app.HISTORY_TOKEN_BUDGET